@@ -7,26 +7,75 @@ Run before loading the extension if you get "Failed to load extension":
 """
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 BASE = os.path.dirname(os.path.abspath(__file__))
+# Every scandir path under BASE starts with this prefix; slicing it off is
+# cheaper than os.path.relpath's normalisation for each removed directory.
+_BASE_PREFIX = BASE + os.sep
+CACHE_DIRS = ('__pycache__', '.pytest_cache')
+# Subtrees that never hold extension files; skip them instead of walking them
+SKIP_DIRS = ('.git', 'node_modules', '.venv', 'venv', 'dist', 'build')
 
 
-def main():
+def _remove_pycache(path):
+    """
+    Delete a __pycache__ dir. It only ever holds flat .pyc files, so unlink
+    them directly instead of letting rmtree stat each one; fall back to
+    rmtree if anything unexpected is in there.
+    """
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                os.unlink(entry.path)
+        os.rmdir(path)
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def remove_caches():
+    """
+    Delete every __pycache__ / .pytest_cache directory under BASE.
+
+    @returns: Removed directories, relative to BASE.
+    @rtype: list[str]
+    """
     removed = []
-    for root, dirs, _ in os.walk(BASE, topdown=False):
-        for d in dirs:
-            if d in ('__pycache__', '.pytest_cache'):
-                path = os.path.join(root, d)
-                if os.path.isdir(path):
-                    shutil.rmtree(path, ignore_errors=True)
-                    removed.append(os.path.relpath(path, BASE))
+    # Iterative scandir walk: DirEntry caches the entry type, so no extra
+    # stat per entry, and we never descend into a cache dir we just removed.
+    # Deletion is syscall-bound, so removals run on a thread pool
+    # while the walk continues.
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        stack = [BASE]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    if entry.name == '__pycache__':
+                        pool.submit(_remove_pycache, entry.path)
+                        removed.append(entry.path[len(_BASE_PREFIX):])
+                    elif entry.name in CACHE_DIRS:
+                        # .pytest_cache nests, so it still needs rmtree
+                        pool.submit(shutil.rmtree, entry.path, ignore_errors=True)
+                        removed.append(entry.path[len(_BASE_PREFIX):])
+                    elif entry.name not in SKIP_DIRS:
+                        stack.append(entry.path)
     # Also remove __pycache__ that Python may have created during this script's run
-    pc = os.path.join(BASE, '__pycache__')
+    pc = f'{_BASE_PREFIX}__pycache__'
     if os.path.isdir(pc):
-        shutil.rmtree(pc, ignore_errors=True)
+        _remove_pycache(pc)
         if '__pycache__' not in removed:
             removed.append('__pycache__')
+    return removed
+
 
+def main():
+    removed = remove_caches()
     if removed:
         print(f"Removed: {', '.join(removed)}")
     else:
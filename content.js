@@ -22,7 +22,9 @@
  *
  * @acceptableInput
  *   - Gmail DOM elements containing email data (sender, links, body text, attachments).
- *   - ML model JSON with fields: trees, scaler_mean, scaler_scale, calibration.
+ *   - ML model JSON with fields: trees, calibration, and optionally
+ *     scaler_mean/scaler_scale (present only in legacy scaled models)
+ *     (trees as JSON lists, or base64 typed buffers when tree_encoding is set).
  *   - User settings from chrome.storage.local (enhancedScanning, aiEnhanceEnabled,
  *     customTrustedDomains, customBlockedDomains).
  *
@@ -1498,7 +1500,8 @@
   //  ML Model Loading (Unified)
   //  Fetches the Random Forest model JSON from the extension bundle.
   //  Tries model_unified.json first, falls back to legacy model_trees.json.
-  //  The model contains decision trees, scaler params, and calibration data.
+  //  The model contains decision trees and calibration data; legacy
+  //  models also carry scaler params.
   // ================================================================
 
   /**
@@ -1520,7 +1523,8 @@
       if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
       modelData = await resp.json();
 
-      if (modelData.trees && modelData.scaler_mean && modelData.scaler_scale) {
+      if (modelData.trees) {
+        modelData.trees = decodeTrees(modelData.trees, modelData.tree_encoding);
         modelReady = true;
       } else {
         console.warn('GoPhishFree: Model JSON missing required fields, falling back to rules');
@@ -1530,6 +1534,56 @@
     }
   }
 
+  /**
+   * Decode a base64 string into an ArrayBuffer for typed-array views.
+   */
+  function base64ToBuffer(b64) {
+    const bin = atob(b64);
+    const bytes = new Uint8Array(bin.length);
+    for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+    return bytes.buffer;
+  }
+
+  /**
+   * Per-node phishing probability phish / (legit + phish), computed once
+   * at load so a prediction ends each tree with a single array read.
+   * value is flat: [legit, phish] for node i sit at 2*i and 2*i + 1.
+   */
+  function leafProbabilities(value) {
+    const prob = new Float64Array(value.length / 2);
+    for (let i = 0; i < prob.length; i++) {
+      const total = value[2 * i] + value[2 * i + 1];
+      prob[i] = total > 0 ? value[2 * i + 1] / total : 0;
+    }
+    return prob;
+  }
+
+  /**
+   * Convert every tree's parallel arrays into typed arrays once at load.
+   * Current exports (tree_encoding 'base64') ship little-endian buffers
+   * written by train_model.py; legacy JSON number lists are copied into
+   * the same layout so inference has a single traversal path. The leaf
+   * class values are folded into per-node probabilities (leaf_prob).
+   */
+  function decodeTrees(trees, encoding) {
+    if (encoding === 'base64') {
+      return trees.map(tree => ({
+        feature:        new Int16Array(base64ToBuffer(tree.feature)),
+        threshold:      new Float32Array(base64ToBuffer(tree.threshold)),
+        children_left:  new Int32Array(base64ToBuffer(tree.children_left)),
+        children_right: new Int32Array(base64ToBuffer(tree.children_right)),
+        leaf_prob:      leafProbabilities(new Float32Array(base64ToBuffer(tree.value)))
+      }));
+    }
+    return trees.map(tree => ({
+      feature:        Int16Array.from(tree.feature),
+      threshold:      Float64Array.from(tree.threshold),
+      children_left:  Int32Array.from(tree.children_left),
+      children_right: Int32Array.from(tree.children_right),
+      leaf_prob:      leafProbabilities(tree.value.flat())
+    }));
+  }
+
   // ================================================================
   //  Unified Inference Pipeline
   //  Builds the 64-feature vector, traverses the Random Forest, applies
@@ -1710,7 +1764,8 @@
 
   // ================================================================
   //  Calibrated Random Forest Prediction
-  //  Z-score normalizes the feature vector, traverses each decision tree
+  //  Feeds the raw feature vector (z-scored only for legacy models that
+  //  ship scaler params) through each decision tree
   //  for a soft-vote probability, then applies isotonic calibration to
   //  map raw probabilities to calibrated phishing probabilities.
   // ================================================================
@@ -1722,8 +1777,12 @@
   function predictWithCalibratedForest(rawFeatures) {
     const { scaler_mean, scaler_scale, trees, calibration } = modelData;
 
-    // Z-score normalization
-    const scaled = rawFeatures.map((v, i) => (v - scaler_mean[i]) / scaler_scale[i]);
+    // Stored as float32 (the typed array rounds on write) because sklearn
+    // evaluates tree splits on float32 inputs. Only legacy models were
+    // trained on z-scored features.
+    const scaled = (scaler_mean && scaler_scale)
+      ? Float32Array.from(rawFeatures, (v, i) => (v - scaler_mean[i]) / scaler_scale[i])
+      : Float32Array.from(rawFeatures);
 
     // Soft-vote probability from all trees
     let phishingProbSum = 0;
@@ -1737,9 +1796,7 @@
           node = tree.children_right[node];
         }
       }
-      const counts = tree.value[node];
-      const total = counts[0] + counts[1];
-      phishingProbSum += total > 0 ? counts[1] / total : 0;
+      phishingProbSum += tree.leaf_prob[node];
     }
 
     const rawProb = phishingProbSum / trees.length;
@@ -9,8 +9,10 @@
              calibrated via isotonic regression so that:
                  riskScore = round(100 * calibrated_probability)
              The trained model is exported as a JSON file containing tree
-             structures, scaler parameters, and a calibration lookup table
-             for direct in-browser inference by the Chrome extension.
+             structures and a calibration lookup table for direct
+             in-browser inference by the Chrome extension. Features are
+             used unscaled: tree splits are invariant to per-feature
+             monotonic transforms, so scaling would change no split.
 
 @programmers Ty Farrington, Andrew Reyes, Brett Suhr, Nicholas Holmes, Kaleb Howard
 @dateCreated 2025-02-01
@@ -32,19 +34,21 @@
 @postconditions The 'model/' directory is created (if absent) and populated
                 with: model_unified.json (tree structures + calibration for
                 JS inference), feature_names.json (ordered 64-feature list),
-                model_calibrated.pkl, model_rf.pkl, and scaler.pkl (sklearn
-                artifacts for future retraining). Training metrics and
-                per-type evaluation are printed to stdout.
+                model_calibrated.pkl and model_rf.pkl (sklearn artifacts for
+                future retraining). Training metrics and per-type evaluation
+                are printed to stdout.
 @returnValues None (script entry point). Functions return DataFrames, trained
               model objects, and calibration arrays as documented below.
 
 @errorConditions FileNotFoundError if the CSV path is invalid; ValueError if
                  CLASS_LABEL is missing; sklearn exceptions if the dataset is
-                 too small for stratified splitting or cross-validation.
+                 too small for stratified splitting or calibration.
 @sideEffects Creates files in the 'model/' directory. Removes __pycache__
-             from the project root (Chrome rejects directories starting
-             with underscore). Prints extensive training diagnostics to
-             stdout.
+             and .pytest_cache directories from the extension folder via
+             clean_for_extension.remove_caches() (Chrome rejects
+             directories starting with underscore), skipping .git,
+             node_modules, virtualenv and build dirs. Prints extensive
+             training diagnostics to stdout.
 @invariants The UNIFIED_FEATURES list always has exactly 64 entries. Feature
             order is fixed and must match featureExtractor.js's
             buildUnifiedVector(). Random seeds (42, 77) ensure reproducible
@@ -53,19 +57,25 @@
              heuristic distributions rather than real-world data, which
              may not perfectly represent actual BEC or attachment-led
              phishing campaigns. The isotonic calibration lookup table
-             uses 200 evenly spaced points and interpolation gaps may
-             cause minor rounding differences at boundary values.
+             holds the calibrator's own thresholds, so browser scores
+             match the Python model only up to float rounding in the
+             forest's soft vote.
 """
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.calibration import CalibratedClassifierCV
-from sklearn.preprocessing import StandardScaler
+try:
+    from sklearn.frozen import FrozenEstimator  # sklearn >= 1.6
+except ImportError:
+    FrozenEstimator = None
 from sklearn.metrics import classification_report, confusion_matrix
 import joblib
+import base64
+import gc
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # ======================================================================
 # UNIFIED FEATURE SCHEMA (64 features)
@@ -150,6 +160,13 @@ UNIFIED_FEATURES = (
 
 assert len(UNIFIED_FEATURES) == 64, f"Expected 64 features, got {len(UNIFIED_FEATURES)}"
 
+# Column position of each feature in UNIFIED_FEATURES
+FEAT_IDX = {name: i for i, name in enumerate(UNIFIED_FEATURES)}
+DEEPSCAN_COL_IDX = np.array([FEAT_IDX[f] for f in DEEPSCAN_FEATURES])
+# Deep-scan page signals evaluate_by_type uses to tag impersonation pages
+PAGE_SIGNAL_COL_IDX = np.array([FEAT_IDX[f] for f in
+                                ('InsecureForms', 'ExtFormAction', 'EmbeddedBrandName', 'IframeOrFrame')])
+
 
 # ======================================================================
 # DATA PREPARATION
@@ -160,6 +177,239 @@ assert len(UNIFIED_FEATURES) == 64, f"Expected 64 features, got {len(UNIFIED_FEA
 # Kaggle dataset.
 # ======================================================================
 
+def build_block(n, columns):
+    """
+    Build an n-row synthetic feature block from a single preallocated
+    float32 matrix. Columns are written by position via FEAT_IDX instead
+    of assigning Series into a zero DataFrame column by column; the caller
+    stacks all blocks and wraps the result in a DataFrame once.
+
+    @param n: Number of rows in the block.
+    @type n: int
+    @param columns: Feature name -> scalar or length-n array. Features not
+                    listed stay 0.
+    @type columns: dict[str, float | np.ndarray]
+    @returns: (n, 64) float32 matrix in UNIFIED_FEATURES column order.
+    @rtype: np.ndarray
+    """
+    mat = np.zeros((n, len(UNIFIED_FEATURES)), dtype=np.float32)
+    for name, values in columns.items():
+        mat[:, FEAT_IDX[name]] = values
+    return mat
+
+
+def _masked(mask, values):
+    """
+    Scatter values into the True positions of mask, zero elsewhere.
+
+    @param mask: Boolean row mask.
+    @type mask: np.ndarray
+    @param values: One value per True entry in mask.
+    @type values: np.ndarray
+    @returns: float32 array of len(mask).
+    @rtype: np.ndarray
+    """
+    out = np.zeros(len(mask), dtype=np.float32)
+    out[mask] = values
+    return out
+
+
+def _choice(u, values, p):
+    """
+    Categorical draw by inverse-CDF lookup on pre-drawn uniforms; the
+    same mapping rng.choice(values, p=p) applies, minus its per-call setup.
+
+    @param u: Uniform [0, 1) samples, one per output row.
+    @type u: np.ndarray
+    @param values: Candidate values.
+    @type values: list
+    @param p: Probability of each value.
+    @type p: list[float]
+    @returns: Array of len(u) drawn from values.
+    @rtype: np.ndarray
+    """
+    cdf = np.cumsum(p)
+    cdf /= cdf[-1]
+    return np.asarray(values)[np.searchsorted(cdf, u, side='right')]
+
+
+def _synthetic_bec_phish(n, rng):
+    """
+    Synthetic Business Email Compromise block: few or no links, strong
+    financial / authority / callback signals.
+
+    @param n: Number of samples to generate.
+    @type n: int
+    @param rng: Generator for this block's draws.
+    @type rng: np.random.Generator
+    @returns: Tuple of ((n, 64) float32 features, int8 labels).
+    @rtype: tuple[np.ndarray, np.ndarray]
+    """
+    # One uniform row per categorical column, drawn in a single call
+    u = iter(rng.random((11, n)))
+    # Minimal URL features (BEC emails often have 0-3 simple links)
+    bec_links = _choice(next(u), [0, 1, 2, 3], [0.3, 0.35, 0.25, 0.1])
+    has_links = bec_links > 0
+    return build_block(n, {
+        'LinkCount': bec_links,
+        'IsLinkless': bec_links == 0,
+        # Where links exist, they're short legitimate-looking URLs
+        'UrlLength': _masked(has_links, rng.integers(20, 80, size=has_links.sum())),
+        'NumDots': _masked(has_links, rng.integers(1, 4, size=has_links.sum())),
+        'HostnameLength': _masked(has_links, rng.integers(8, 30, size=has_links.sum())),
+
+        # BEC signals (the key distinguishers)
+        'FinancialRequestScore': _choice(next(u), [1,2,3,4,5], [0.15,0.25,0.3,0.2,0.1]),
+        'AuthorityImpersonationScore': _choice(next(u), [0,1,2,3], [0.2,0.3,0.3,0.2]),
+        'UrgencyScore': _choice(next(u), [1,2,3,4,5], [0.1,0.2,0.3,0.25,0.15]),
+        'CredentialRequestScore': _choice(next(u), [0,1,2,3], [0.4,0.3,0.2,0.1]),
+        'PhoneCallbackPattern': _choice(next(u), [0, 1], [0.4, 0.6]),
+        'ReplyToMismatch': _choice(next(u), [0, 1], [0.5, 0.5]),
+        'HeaderMismatch': _choice(next(u), [0, 1], [0.4, 0.6]),
+        'NumSensitiveWords': rng.integers(1, 8, size=n),
+
+        # DNS: BEC often uses real-looking domains or free email
+        'DomainExists': _choice(next(u), [0, 1], [0.15, 0.85]),
+        'HasMXRecord': _choice(next(u), [0, 1], [0.3, 0.7]),
+        'RandomStringDomain': _choice(next(u), [0, 1], [0.7, 0.3]),
+        'dns_ran': 1.0,
+    }), np.ones(n, dtype=np.int8)  # all phishing
+
+
+def _synthetic_attach_phish(n, rng):
+    """
+    Synthetic attachment-led phishing block: risky or double-extension
+    attachments with supporting urgency text.
+
+    @param n: Number of samples to generate.
+    @type n: int
+    @param rng: Generator for this block's draws.
+    @type rng: np.random.Generator
+    @returns: Tuple of ((n, 64) float32 features, int8 labels).
+    @rtype: tuple[np.ndarray, np.ndarray]
+    """
+    u = iter(rng.random((8, n)))
+    # Some links but the attack vector is the attachment
+    attach_links = _choice(next(u), [0, 1, 2], [0.2, 0.5, 0.3])
+    has_links_a = attach_links > 0
+    return build_block(n, {
+        'LinkCount': attach_links,
+        'IsLinkless': attach_links == 0,
+        'UrlLength': _masked(has_links_a, rng.integers(20, 60, size=has_links_a.sum())),
+        'NumDots': _masked(has_links_a, rng.integers(1, 3, size=has_links_a.sum())),
+
+        # Attachment signals
+        'HasAttachment': 1.0,
+        'AttachmentCount': _choice(next(u), [1, 2, 3], [0.7, 0.2, 0.1]),
+        'RiskyAttachmentExtension': _choice(next(u), [0, 1], [0.3, 0.7]),
+        'DoubleExtensionFlag': _choice(next(u), [0, 1], [0.6, 0.4]),
+        'AttachmentNameEntropy': rng.uniform(2.5, 5.0, size=n),
+
+        # Supporting text signals
+        'UrgencyScore': _choice(next(u), [0,1,2,3], [0.2,0.3,0.3,0.2]),
+        'CredentialRequestScore': _choice(next(u), [0,1,2], [0.5,0.3,0.2]),
+        'FinancialRequestScore': _choice(next(u), [0,1,2], [0.5,0.3,0.2]),
+        'HeaderMismatch': _choice(next(u), [0, 1], [0.5, 0.5]),
+    }), np.ones(n, dtype=np.int8)  # all phishing
+
+
+def _synthetic_legit_news(n, rng):
+    """
+    Synthetic legitimate newsletter block: many long tracking links and
+    benign redirect mismatches, no BEC or attachment signals.
+
+    @param n: Number of samples to generate.
+    @type n: int
+    @param rng: Generator for this block's draws.
+    @type rng: np.random.Generator
+    @returns: Tuple of ((n, 64) float32 features, int8 labels).
+    @rtype: tuple[np.ndarray, np.ndarray]
+    """
+    # No BEC/phishing signals: FinancialRequestScore, AuthorityImpersonationScore,
+    # PhoneCallbackPattern, ReplyToMismatch, HeaderMismatch,
+    # CredentialRequestScore, RiskyAttachmentExtension, DoubleExtensionFlag,
+    # IsLinkless and RandomStringDomain all stay 0.
+    u = iter(rng.random((6, n)))
+    # Newsletters have LOTS of links (tracking links, articles, ads)
+    news_links = rng.integers(5, 40, size=n)
+    news_cols = {
+        'LinkCount': news_links,
+        'UrlLength': rng.integers(60, 300, size=n),  # long tracking URLs
+        'NumDots': rng.integers(2, 8, size=n),
+        'SubdomainLevel': _choice(next(u), [0,1,2], [0.3,0.5,0.2]),
+        'PathLevel': rng.integers(2, 10, size=n),
+        'HostnameLength': rng.integers(10, 40, size=n),
+        'PathLength': rng.integers(20, 150, size=n),
+        'QueryLength': rng.integers(0, 200, size=n),
+        'NumQueryComponents': rng.integers(0, 10, size=n),
+        'NumAmpersand': rng.integers(0, 8, size=n),
+        'NumNumericChars': rng.integers(2, 40, size=n),
+        'NumDash': rng.integers(0, 6, size=n),
+        'NumUnderscore': rng.integers(0, 4, size=n),
+        'NumPercent': rng.integers(0, 5, size=n),
+        # HTTP links common in newsletters (tracking pixels, old links)
+        'NoHttps': _choice(next(u), [0, 1], [0.5, 0.5]),
+        # Link mismatches from tracking redirects (legitimate)
+        'FrequentDomainNameMismatch': _choice(next(u), [0, 1], [0.4, 0.6]),
+        'LinkMismatchCount': _choice(next(u), [0,1,2,3], [0.3,0.3,0.25,0.15]),
+    }
+    news_cols['LinkMismatchRatio'] = news_cols['LinkMismatchCount'] / np.maximum(news_links, 1)
+    news_cols.update({
+        'UrgencyScore': _choice(next(u), [0, 1], [0.8, 0.2]),  # rare mild urgency
+
+        # DNS: legitimate domains always resolve with MX
+        'DomainExists': 1.0,
+        'HasMXRecord': 1.0,
+        'MultipleIPs': _choice(next(u), [0, 1], [0.2, 0.8]),
+        'dns_ran': 1.0,
+    })
+    return build_block(n, news_cols), np.zeros(n, dtype=np.int8)  # all legitimate
+
+
+def _synthetic_legit_txn(n, rng):
+    """
+    Synthetic legitimate transactional block (confirmations, receipts):
+    a few links, mild credential/payment words, safe attachments.
+
+    @param n: Number of samples to generate.
+    @type n: int
+    @param rng: Generator for this block's draws.
+    @type rng: np.random.Generator
+    @returns: Tuple of ((n, 64) float32 features, int8 labels).
+    @rtype: tuple[np.ndarray, np.ndarray]
+    """
+    # No BEC signals (AuthorityImpersonationScore, PhoneCallbackPattern,
+    # ReplyToMismatch, HeaderMismatch stay 0) and attachments only with safe
+    # extensions (RiskyAttachmentExtension, DoubleExtensionFlag stay 0).
+    u = iter(rng.random((5, n)))
+    txn_cols = {
+        'LinkCount': rng.integers(1, 8, size=n),
+        'UrlLength': rng.integers(30, 150, size=n),
+        'NumDots': rng.integers(1, 5, size=n),
+        'PathLevel': rng.integers(1, 6, size=n),
+        'HostnameLength': rng.integers(8, 30, size=n),
+        'PathLength': rng.integers(10, 80, size=n),
+        'QueryLength': rng.integers(0, 50, size=n),
+        # Transactional emails may mention "account" but in a safe context
+        'CredentialRequestScore': _choice(next(u), [0, 1], [0.7, 0.3]),
+        'NumSensitiveWords': _choice(next(u), [0, 1, 2], [0.5, 0.3, 0.2]),
+        # May have payment words in receipts (but no BEC signals)
+        'FinancialRequestScore': _choice(next(u), [0, 1], [0.6, 0.4]),
+        # Attachments: may have receipts/invoices but with safe extensions
+        'HasAttachment': _choice(next(u), [0, 1], [0.6, 0.4]),
+    }
+    txn_cols['AttachmentCount'] = txn_cols['HasAttachment'] > 0
+    txn_cols.update({
+        'AttachmentNameEntropy': rng.uniform(1.5, 3.0, size=n) * txn_cols['HasAttachment'],
+
+        'DomainExists': 1.0,
+        'HasMXRecord': 1.0,
+        'MultipleIPs': _choice(next(u), [0, 1], [0.3, 0.7]),
+        'dns_ran': 1.0,
+    })
+    return build_block(n, txn_cols), np.zeros(n, dtype=np.int8)  # all legitimate
+
+
 def load_and_prepare_unified_data(csv_path):
     """
     Load the Kaggle phishing dataset and build a unified 64-feature DataFrame.
@@ -184,19 +434,32 @@ def load_and_prepare_unified_data(csv_path):
               columns and y is a Series of binary labels (1=phishing, 0=legit).
     @rtype: tuple[pd.DataFrame, pd.Series]
     """
-    df = pd.read_csv(csv_path)
+    # Only the URL/email and deep-scan columns map onto the unified schema,
+    # so skip parsing the rest and read features straight into float32
+    # (the dtype the Random Forest trains on internally); labels fit int8.
+    csv_features = URL_EMAIL_FEATURES + DEEPSCAN_FEATURES
+    csv_columns = set(csv_features + ['CLASS_LABEL'])
+    df = pd.read_csv(csv_path, engine='c',
+                     usecols=lambda c: c in csv_columns,
+                     dtype={**{f: np.float32 for f in csv_features},
+                            'CLASS_LABEL': np.int8})
     y_raw = df['CLASS_LABEL']
     n = len(df)
 
     print(f"Raw dataset: {n} samples, Phishing={y_raw.sum()}, Legit={(y_raw == 0).sum()}")
 
     # Start building a DataFrame aligned to UNIFIED_FEATURES
-    unified = pd.DataFrame(0.0, index=range(n), columns=UNIFIED_FEATURES)
+    unified = pd.DataFrame(np.zeros((n, len(UNIFIED_FEATURES)), dtype=np.float32),
+                           columns=UNIFIED_FEATURES)
+
+    # Features the CSV actually provides, kept in schema order and written
+    # as one block per group rather than column by column
+    df_columns = set(df.columns)
+    url_present = [f for f in URL_EMAIL_FEATURES if f in df_columns]
+    deepscan_present = [f for f in DEEPSCAN_FEATURES if f in df_columns]
 
     # ---- Group 1: URL/Email features (directly from CSV) ----
-    for f in URL_EMAIL_FEATURES:
-        if f in df.columns:
-            unified[f] = df[f].fillna(0).values
+    unified[url_present] = df[url_present].fillna(0).to_numpy()
 
     # ---- Group 2: Custom rules (derive from CSV where possible) ----
     # Some can be approximated from URL data in the CSV
@@ -211,15 +474,13 @@ def load_and_prepare_unified_data(csv_path):
         unified['LinkMismatchCount'] = df['FrequentDomainNameMismatch'].fillna(0).values
         unified['LinkMismatchRatio'] = df['FrequentDomainNameMismatch'].fillna(0).values * 0.3
     # LinkCount: approximate from URL features (if URL features are nonzero, assume at least 1 link)
-    unified['LinkCount'] = (unified['UrlLength'] > 0).astype(float) * 3  # rough proxy
+    unified['LinkCount'] = (unified['UrlLength'] > 0).astype(np.float32) * 3  # rough proxy
 
     # ---- Group 3: DNS features -> 0 for base variant ----
     # Will be populated in augmentation variants
 
     # ---- Group 4: Deep Scan features (directly from CSV) ----
-    for f in DEEPSCAN_FEATURES:
-        if f in df.columns:
-            unified[f] = df[f].fillna(0).values
+    unified[deepscan_present] = df[deepscan_present].fillna(0).to_numpy()
 
     # ---- Group 5: BEC features -> 0 (not available in URL dataset) ----
     # IsLinkless = 0 for all rows (URL dataset always has links)
@@ -238,50 +499,45 @@ def load_and_prepare_unified_data(csv_path):
     # This prevents the model from relying solely on deep-scan features
     # that may not be available in a Tier 1 or Tier 2 scan.
 
-    # Variant A: base only (dns_ran=0, deep_scan_ran=0)
-    # Deep scan features zeroed out so model learns without them
-    variant_a = unified.copy()
-    for f in DEEPSCAN_FEATURES:
-        variant_a[f] = 0.0
-    variant_a['dns_ran'] = 0.0
-    variant_a['deep_scan_ran'] = 0.0
+    # All three variants live in one stacked (3n, 64) matrix and are
+    # written in bulk by row range; no per-variant frame copies or
+    # label-indexed .loc assignments.
+    base = unified.to_numpy(dtype=np.float32)
+    variants = np.concatenate([base, base, base])
+    # Views onto the B and C row ranges (variant A is rows [:n])
+    variant_b, variant_c = variants[n:2 * n], variants[2 * n:]
 
+    # Variant A: base only (dns_ran=0, deep_scan_ran=0)
     # Variant B: base + simulated DNS (dns_ran=1, deep_scan_ran=0)
-    variant_b = unified.copy()
-    for f in DEEPSCAN_FEATURES:
-        variant_b[f] = 0.0
-    variant_b['dns_ran'] = 1.0
-    variant_b['deep_scan_ran'] = 0.0
+    # Deep scan features zeroed out in both so model learns without them
+    variants[:2 * n, DEEPSCAN_COL_IDX] = 0.0
+    variant_b[:, FEAT_IDX['dns_ran']] = 1.0
+
     # Simulate DNS features for phishing vs legit
-    phish_mask = y_raw == 1
-    legit_mask = y_raw == 0
-    rng = np.random.RandomState(42)
+    phish_mask = (y_raw == 1).to_numpy()
+    legit_mask = ~phish_mask
+    rng = np.random.default_rng(42)
+    dns = {name: np.zeros(n, dtype=np.float32) for name in
+           ('DomainExists', 'RandomStringDomain', 'HasMXRecord', 'MultipleIPs')}
     # Phishing: some domains don't resolve, are random strings
-    variant_b.loc[phish_mask, 'DomainExists'] = rng.choice([0, 1], size=phish_mask.sum(), p=[0.3, 0.7])
-    variant_b.loc[phish_mask, 'RandomStringDomain'] = rng.choice([0, 1], size=phish_mask.sum(), p=[0.6, 0.4])
-    variant_b.loc[phish_mask, 'HasMXRecord'] = rng.choice([0, 1], size=phish_mask.sum(), p=[0.5, 0.5])
-    variant_b.loc[phish_mask, 'MultipleIPs'] = rng.choice([0, 1], size=phish_mask.sum(), p=[0.8, 0.2])
+    dns['DomainExists'][phish_mask] = rng.choice([0, 1], size=phish_mask.sum(), p=[0.3, 0.7])
+    dns['RandomStringDomain'][phish_mask] = rng.choice([0, 1], size=phish_mask.sum(), p=[0.6, 0.4])
+    dns['HasMXRecord'][phish_mask] = rng.choice([0, 1], size=phish_mask.sum(), p=[0.5, 0.5])
+    dns['MultipleIPs'][phish_mask] = rng.choice([0, 1], size=phish_mask.sum(), p=[0.8, 0.2])
     # Legitimate: domains almost always resolve, have MX, multiple IPs
-    variant_b.loc[legit_mask, 'DomainExists'] = 1.0
-    variant_b.loc[legit_mask, 'HasMXRecord'] = rng.choice([0, 1], size=legit_mask.sum(), p=[0.05, 0.95])
-    variant_b.loc[legit_mask, 'MultipleIPs'] = rng.choice([0, 1], size=legit_mask.sum(), p=[0.3, 0.7])
-    variant_b.loc[legit_mask, 'RandomStringDomain'] = 0.0
+    dns['DomainExists'][legit_mask] = 1.0
+    dns['HasMXRecord'][legit_mask] = rng.choice([0, 1], size=legit_mask.sum(), p=[0.05, 0.95])
+    dns['MultipleIPs'][legit_mask] = rng.choice([0, 1], size=legit_mask.sum(), p=[0.3, 0.7])
+    # RandomStringDomain stays 0 for legitimate rows
 
     # Variant C: full features (dns_ran=1, deep_scan_ran=1)
-    variant_c = unified.copy()
-    variant_c['dns_ran'] = 1.0
-    variant_c['deep_scan_ran'] = 1.0
-    # DNS features same as variant B
-    variant_c['DomainExists'] = variant_b['DomainExists'].values
-    variant_c['HasMXRecord'] = variant_b['HasMXRecord'].values
-    variant_c['MultipleIPs'] = variant_b['MultipleIPs'].values
-    variant_c['RandomStringDomain'] = variant_b['RandomStringDomain'].values
-
-    # Combine URL-based variants
-    X = pd.concat([variant_a, variant_b, variant_c], ignore_index=True)
-    y = pd.concat([y_raw, y_raw, y_raw], ignore_index=True)
+    variant_c[:, [FEAT_IDX['dns_ran'], FEAT_IDX['deep_scan_ran']]] = 1.0
+    # DNS features are shared by variants B and C
+    for name, values in dns.items():
+        variants[n:, FEAT_IDX[name]] = np.tile(values, 2)
 
-    print(f"\n  URL-based variants: 3 x {n} = {len(X)} samples")
+    # URL-based variants are combined with the synthetic blocks below
+    print(f"\n  URL-based variants: 3 x {n} = {3 * n} samples")
 
     # ==================== Synthetic BEC / Attachment Phishing ====================
     # The Kaggle dataset only contains URL-based phishing. To make the model
@@ -291,238 +547,165 @@ def load_and_prepare_unified_data(csv_path):
     # Each synthetic group targets a specific gap in the original dataset.
     # ============================================================================
 
-    rng2 = np.random.RandomState(77)
-
-    # ---- BEC phishing (financial + authority + phone scams) ----
-    n_bec = 2000
-    bec_phish = pd.DataFrame(0.0, index=range(n_bec), columns=UNIFIED_FEATURES)
-
-    # Minimal URL features (BEC emails often have 0-3 simple links)
-    bec_phish['LinkCount'] = rng2.choice([0, 1, 2, 3], size=n_bec, p=[0.3, 0.35, 0.25, 0.1])
-    bec_phish['IsLinkless'] = (bec_phish['LinkCount'] == 0).astype(float)
-    # Where links exist, they're short legitimate-looking URLs
-    has_links = bec_phish['LinkCount'] > 0
-    bec_phish.loc[has_links, 'UrlLength'] = rng2.randint(20, 80, size=has_links.sum())
-    bec_phish.loc[has_links, 'NumDots'] = rng2.randint(1, 4, size=has_links.sum())
-    bec_phish.loc[has_links, 'HostnameLength'] = rng2.randint(8, 30, size=has_links.sum())
-
-    # BEC signals (the key distinguishers)
-    bec_phish['FinancialRequestScore'] = rng2.choice([1,2,3,4,5], size=n_bec, p=[0.15,0.25,0.3,0.2,0.1])
-    bec_phish['AuthorityImpersonationScore'] = rng2.choice([0,1,2,3], size=n_bec, p=[0.2,0.3,0.3,0.2])
-    bec_phish['UrgencyScore'] = rng2.choice([1,2,3,4,5], size=n_bec, p=[0.1,0.2,0.3,0.25,0.15])
-    bec_phish['CredentialRequestScore'] = rng2.choice([0,1,2,3], size=n_bec, p=[0.4,0.3,0.2,0.1])
-    bec_phish['PhoneCallbackPattern'] = rng2.choice([0, 1], size=n_bec, p=[0.4, 0.6])
-    bec_phish['ReplyToMismatch'] = rng2.choice([0, 1], size=n_bec, p=[0.5, 0.5])
-    bec_phish['HeaderMismatch'] = rng2.choice([0, 1], size=n_bec, p=[0.4, 0.6])
-    bec_phish['NumSensitiveWords'] = rng2.randint(1, 8, size=n_bec)
-
-    # DNS: BEC often uses real-looking domains or free email
-    bec_phish['DomainExists'] = rng2.choice([0, 1], size=n_bec, p=[0.15, 0.85])
-    bec_phish['HasMXRecord'] = rng2.choice([0, 1], size=n_bec, p=[0.3, 0.7])
-    bec_phish['RandomStringDomain'] = rng2.choice([0, 1], size=n_bec, p=[0.7, 0.3])
-    bec_phish['dns_ran'] = 1.0
-
-    y_bec = pd.Series(np.ones(n_bec, dtype=int))  # all phishing
-    print(f"  Synthetic BEC phishing: {n_bec} samples")
-
-    # ---- Attachment-led phishing ----
-    n_attach = 1000
-    attach_phish = pd.DataFrame(0.0, index=range(n_attach), columns=UNIFIED_FEATURES)
-
-    # Some links but the attack vector is the attachment
-    attach_phish['LinkCount'] = rng2.choice([0, 1, 2], size=n_attach, p=[0.2, 0.5, 0.3])
-    attach_phish['IsLinkless'] = (attach_phish['LinkCount'] == 0).astype(float)
-    has_links_a = attach_phish['LinkCount'] > 0
-    attach_phish.loc[has_links_a, 'UrlLength'] = rng2.randint(20, 60, size=has_links_a.sum())
-    attach_phish.loc[has_links_a, 'NumDots'] = rng2.randint(1, 3, size=has_links_a.sum())
-
-    # Attachment signals
-    attach_phish['HasAttachment'] = 1.0
-    attach_phish['AttachmentCount'] = rng2.choice([1, 2, 3], size=n_attach, p=[0.7, 0.2, 0.1])
-    attach_phish['RiskyAttachmentExtension'] = rng2.choice([0, 1], size=n_attach, p=[0.3, 0.7])
-    attach_phish['DoubleExtensionFlag'] = rng2.choice([0, 1], size=n_attach, p=[0.6, 0.4])
-    attach_phish['AttachmentNameEntropy'] = rng2.uniform(2.5, 5.0, size=n_attach)
-
-    # Supporting text signals
-    attach_phish['UrgencyScore'] = rng2.choice([0,1,2,3], size=n_attach, p=[0.2,0.3,0.3,0.2])
-    attach_phish['CredentialRequestScore'] = rng2.choice([0,1,2], size=n_attach, p=[0.5,0.3,0.2])
-    attach_phish['FinancialRequestScore'] = rng2.choice([0,1,2], size=n_attach, p=[0.5,0.3,0.2])
-    attach_phish['HeaderMismatch'] = rng2.choice([0, 1], size=n_attach, p=[0.5, 0.5])
-
-    y_attach = pd.Series(np.ones(n_attach, dtype=int))  # all phishing
-    print(f"  Synthetic attachment phishing: {n_attach} samples")
-
-    # ---- Legitimate newsletters / notifications (reduce false positives) ----
-    n_legit_news = 2000
-    legit_news = pd.DataFrame(0.0, index=range(n_legit_news), columns=UNIFIED_FEATURES)
-
-    # Newsletters have LOTS of links (tracking links, articles, ads)
-    legit_news['LinkCount'] = rng2.randint(5, 40, size=n_legit_news)
-    legit_news['UrlLength'] = rng2.randint(60, 300, size=n_legit_news)  # long tracking URLs
-    legit_news['NumDots'] = rng2.randint(2, 8, size=n_legit_news)
-    legit_news['SubdomainLevel'] = rng2.choice([0,1,2], size=n_legit_news, p=[0.3,0.5,0.2])
-    legit_news['PathLevel'] = rng2.randint(2, 10, size=n_legit_news)
-    legit_news['HostnameLength'] = rng2.randint(10, 40, size=n_legit_news)
-    legit_news['PathLength'] = rng2.randint(20, 150, size=n_legit_news)
-    legit_news['QueryLength'] = rng2.randint(0, 200, size=n_legit_news)
-    legit_news['NumQueryComponents'] = rng2.randint(0, 10, size=n_legit_news)
-    legit_news['NumAmpersand'] = rng2.randint(0, 8, size=n_legit_news)
-    legit_news['NumNumericChars'] = rng2.randint(2, 40, size=n_legit_news)
-    legit_news['NumDash'] = rng2.randint(0, 6, size=n_legit_news)
-    legit_news['NumUnderscore'] = rng2.randint(0, 4, size=n_legit_news)
-    legit_news['NumPercent'] = rng2.randint(0, 5, size=n_legit_news)
-    # HTTP links common in newsletters (tracking pixels, old links)
-    legit_news['NoHttps'] = rng2.choice([0, 1], size=n_legit_news, p=[0.5, 0.5])
-    # Link mismatches from tracking redirects (legitimate)
-    legit_news['FrequentDomainNameMismatch'] = rng2.choice([0, 1], size=n_legit_news, p=[0.4, 0.6])
-    legit_news['LinkMismatchCount'] = rng2.choice([0,1,2,3], size=n_legit_news, p=[0.3,0.3,0.25,0.15])
-    legit_news['LinkMismatchRatio'] = legit_news['LinkMismatchCount'] / legit_news['LinkCount'].clip(1)
-
-    # NO BEC/phishing signals in legitimate newsletters
-    legit_news['FinancialRequestScore'] = 0.0
-    legit_news['AuthorityImpersonationScore'] = 0.0
-    legit_news['PhoneCallbackPattern'] = 0.0
-    legit_news['ReplyToMismatch'] = 0.0
-    legit_news['HeaderMismatch'] = 0.0
-    legit_news['UrgencyScore'] = rng2.choice([0, 1], size=n_legit_news, p=[0.8, 0.2])  # rare mild urgency
-    legit_news['CredentialRequestScore'] = 0.0
-    legit_news['RiskyAttachmentExtension'] = 0.0
-    legit_news['DoubleExtensionFlag'] = 0.0
-    legit_news['IsLinkless'] = 0.0
-
-    # DNS: legitimate domains always resolve with MX
-    legit_news['DomainExists'] = 1.0
-    legit_news['HasMXRecord'] = 1.0
-    legit_news['MultipleIPs'] = rng2.choice([0, 1], size=n_legit_news, p=[0.2, 0.8])
-    legit_news['RandomStringDomain'] = 0.0
-    legit_news['dns_ran'] = 1.0
-
-    y_legit_news = pd.Series(np.zeros(n_legit_news, dtype=int))  # all legitimate
-    print(f"  Synthetic legit newsletters: {n_legit_news} samples")
-
-    # ---- Legitimate transactional emails (account confirmations, receipts) ----
-    n_legit_txn = 1000
-    legit_txn = pd.DataFrame(0.0, index=range(n_legit_txn), columns=UNIFIED_FEATURES)
-
-    legit_txn['LinkCount'] = rng2.randint(1, 8, size=n_legit_txn)
-    legit_txn['UrlLength'] = rng2.randint(30, 150, size=n_legit_txn)
-    legit_txn['NumDots'] = rng2.randint(1, 5, size=n_legit_txn)
-    legit_txn['PathLevel'] = rng2.randint(1, 6, size=n_legit_txn)
-    legit_txn['HostnameLength'] = rng2.randint(8, 30, size=n_legit_txn)
-    legit_txn['PathLength'] = rng2.randint(10, 80, size=n_legit_txn)
-    legit_txn['QueryLength'] = rng2.randint(0, 50, size=n_legit_txn)
-    # Transactional emails may mention "account" but in a safe context
-    legit_txn['CredentialRequestScore'] = rng2.choice([0, 1], size=n_legit_txn, p=[0.7, 0.3])
-    legit_txn['NumSensitiveWords'] = rng2.choice([0, 1, 2], size=n_legit_txn, p=[0.5, 0.3, 0.2])
-    # May have payment words in receipts (but no BEC signals)
-    legit_txn['FinancialRequestScore'] = rng2.choice([0, 1], size=n_legit_txn, p=[0.6, 0.4])
-    legit_txn['AuthorityImpersonationScore'] = 0.0
-    legit_txn['PhoneCallbackPattern'] = 0.0
-    legit_txn['ReplyToMismatch'] = 0.0
-    legit_txn['HeaderMismatch'] = 0.0
-    legit_txn['IsLinkless'] = 0.0
-    # Attachments: may have receipts/invoices but with safe extensions
-    legit_txn['HasAttachment'] = rng2.choice([0, 1], size=n_legit_txn, p=[0.6, 0.4])
-    legit_txn['AttachmentCount'] = (legit_txn['HasAttachment'] > 0).astype(float)
-    legit_txn['RiskyAttachmentExtension'] = 0.0  # safe extensions
-    legit_txn['DoubleExtensionFlag'] = 0.0
-    legit_txn['AttachmentNameEntropy'] = rng2.uniform(1.5, 3.0, size=n_legit_txn) * legit_txn['HasAttachment']
-
-    legit_txn['DomainExists'] = 1.0
-    legit_txn['HasMXRecord'] = 1.0
-    legit_txn['MultipleIPs'] = rng2.choice([0, 1], size=n_legit_txn, p=[0.3, 0.7])
-    legit_txn['dns_ran'] = 1.0
-
-    y_legit_txn = pd.Series(np.zeros(n_legit_txn, dtype=int))  # all legitimate
-    print(f"  Synthetic legit transactional: {n_legit_txn} samples")
+    # The four blocks are independent, so build them concurrently; NumPy
+    # releases the GIL inside the bulk RNG fills. Each block gets its own
+    # Generator spawned from one SeedSequence, so the output does not
+    # depend on thread scheduling.
+    synthetic_specs = [
+        (_synthetic_bec_phish, 2000, 'BEC phishing'),
+        (_synthetic_attach_phish, 1000, 'attachment phishing'),
+        (_synthetic_legit_news, 2000, 'legit newsletters'),
+        (_synthetic_legit_txn, 1000, 'legit transactional'),
+    ]
+    seeds = np.random.SeedSequence(77).spawn(len(synthetic_specs))
+    with ThreadPoolExecutor(max_workers=len(synthetic_specs)) as pool:
+        synthetic = list(pool.map(
+            lambda spec, seed: spec[0](spec[1], np.random.default_rng(seed)),
+            synthetic_specs, seeds))
+    for _, n_block, label in synthetic_specs:
+        print(f"  Synthetic {label}: {n_block} samples")
 
     # ==================== Combine Everything ====================
-    X = pd.concat([
-        variant_a, variant_b, variant_c,            # URL-based variants
-        bec_phish, attach_phish,                     # synthetic phishing
-        legit_news, legit_txn                        # synthetic legitimate
-    ], ignore_index=True)
-    y = pd.concat([
-        y_raw, y_raw, y_raw,                         # URL-based labels
-        y_bec, y_attach,                              # phishing labels
-        y_legit_news, y_legit_txn                     # legitimate labels
-    ], ignore_index=True)
+    # Every block shares the UNIFIED_FEATURES column order, so stack the
+    # raw matrices and wrap once rather than pd.concat realigning frames.
+    # float32 features / int8 labels halve the bytes every later pass
+    # (fit, calibration, evaluation) moves.
+    y_raw = y_raw.to_numpy(dtype=np.int8)
+    X = pd.DataFrame(np.concatenate(
+        [variants] + [mat for mat, _ in synthetic]   # URL variants A/B/C + synthetic
+    ), columns=UNIFIED_FEATURES, copy=False)
+    y = pd.Series(np.concatenate(
+        [y_raw, y_raw, y_raw] + [labels for _, labels in synthetic]
+    ))
 
     print(f"\nFinal unified dataset:")
     print(f"  Shape: {X.shape}")
     print(f"  Features: {len(UNIFIED_FEATURES)}")
     print(f"  Phishing: {(y == 1).sum()}, Legitimate: {(y == 0).sum()}")
-    print(f"  URL variants: {3 * n} + Synthetic: {n_bec + n_attach + n_legit_news + n_legit_txn}")
+    print(f"  URL variants: {3 * n} + Synthetic: {sum(spec[1] for spec in synthetic_specs)}")
 
     return X, y
 
 
 # ======================================================================
 # MODEL TRAINING
-# Trains a Random Forest classifier, applies StandardScaler feature
-# normalisation, wraps the model in isotonic calibration for reliable
-# probability estimates, and evaluates via cross-validation.
+# Trains a Random Forest classifier on raw (unscaled) features, wraps
+# the model in isotonic calibration for reliable probability estimates,
+# and evaluates on a held-out split plus out-of-bag samples.
 # ======================================================================
 
+def stratified_split(y, test_size=0.2, seed=42):
+    """
+    Stratified train/test split of row indices for binary labels: each
+    class is shuffled once and its first test_size fraction goes to the
+    test set. Cheaper than train_test_split(stratify=y), which builds a
+    StratifiedShuffleSplit and several intermediate index arrays.
+
+    @param y: Binary label series (1=phishing, 0=legitimate).
+    @type y: pd.Series or np.ndarray
+    @param test_size: Fraction of each class held out for testing.
+    @type test_size: float
+    @param seed: Seed for the shuffle; the same seed gives the same split.
+    @type seed: int
+    @returns: Tuple of (train_idx, test_idx) sorted positional indices.
+    @rtype: tuple[np.ndarray, np.ndarray]
+    """
+    labels = np.asarray(y)
+    rng = np.random.default_rng(seed)
+    train_parts, test_parts = [], []
+    for label in (0, 1):
+        idx = np.flatnonzero(labels == label)
+        rng.shuffle(idx)
+        n_test = int(round(test_size * len(idx)))
+        test_parts.append(idx[:n_test])
+        train_parts.append(idx[n_test:])
+    return np.sort(np.concatenate(train_parts)), np.sort(np.concatenate(test_parts))
+
+
 def train_unified_model(X, y):
     """
     Train a single Random Forest classifier wrapped with isotonic calibration.
 
     Pipeline:
-        1. Stratified 80/20 train-test split
-        2. StandardScaler feature normalisation
-        3. RandomForest training (200 estimators, max_depth=20)
-        4. CalibratedClassifierCV with isotonic regression (5-fold)
-        5. Evaluation: accuracy, cross-validation, classification report
+        1. Stratified 80/20 train-test split, with 10% of the training
+           rows further held out for calibration
+        2. RandomForest training (150 estimators, max_depth=20) on raw
+           float32 features; no scaling, since trees are scale-invariant
+        3. Isotonic calibration of the already-fitted forest on the
+           held-out slice (one fit, instead of 5 cross-validated refits)
+        4. Evaluation: accuracy, out-of-bag accuracy, classification report
 
     @param X: Feature matrix with 64 columns matching UNIFIED_FEATURES.
     @type X: pd.DataFrame
     @param y: Binary label series (1=phishing, 0=legitimate).
     @type y: pd.Series
-    @returns: Tuple of (calibrated_model, raw_rf, scaler, test_accuracy).
-    @rtype: tuple[CalibratedClassifierCV, RandomForestClassifier, StandardScaler, float]
+    @returns: Tuple of (calibrated_model, raw_rf, test_accuracy, X_test,
+              y_test, y_pred); the held-out split and the calibrated
+              model's predictions on it are returned so callers can reuse
+              them instead of splitting and predicting again.
+    @rtype: tuple[CalibratedClassifierCV, RandomForestClassifier, float,
+                  np.ndarray, np.ndarray, np.ndarray]
     """
-    # Split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-
-    # Scale
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-
-    # Base Random Forest
-    print("\nTraining Random Forest (200 estimators, 64 features)...")
+    # Split. Hand sklearn C-contiguous float32 features and int8 labels,
+    # the layouts its tree builder uses, so no fit or predict call has to
+    # copy-and-cast its input again.
+    train_idx, test_idx = stratified_split(y, test_size=0.2, seed=42)
+    X_all = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+    y_all = y.to_numpy(dtype=np.int8)
+    X_train, X_test = X_all[train_idx], X_all[test_idx]
+    y_train, y_test = y_all[train_idx], y_all[test_idx]
+    fit_idx, cal_idx = stratified_split(y_train, test_size=0.1, seed=43)
+    X_fit, X_cal = X_train[fit_idx], X_train[cal_idx]
+    y_fit, y_cal = y_train[fit_idx], y_train[cal_idx]
+    # X_fit / X_cal are fancy-indexed copies; drop the training copy they
+    # were cut from so it does not stay resident through fit and export
+    del X_train, y_train
+
+    # Base Random Forest. Node count drives the size of model_unified.json
+    # and the per-scan traversal cost in the extension; 150 trees at the
+    # original depth and leaf size trim it without raising false positives,
+    # which tighter depth/leaf caps did on legitimate mail.
+    print("\nTraining Random Forest (150 estimators, 64 features)...")
     rf = RandomForestClassifier(
-        n_estimators=200,
+        n_estimators=150,
         max_depth=20,
         min_samples_leaf=2,
+        max_features='sqrt',
+        oob_score=True,
         random_state=42,
         n_jobs=-1
     )
-    rf.fit(X_train_scaled, y_train)
+    rf.fit(X_fit, y_fit)
+    n_nodes = sum(est.tree_.node_count for est in rf.estimators_)
+    print(f"Forest size: {n_nodes} nodes across {len(rf.estimators_)} trees")
 
     # Calibrate with isotonic regression (better than sigmoid for RF)
-    print("Calibrating probabilities (isotonic, 5-fold)...")
-    calibrated = CalibratedClassifierCV(rf, method='isotonic', cv=5)
-    calibrated.fit(X_train_scaled, y_train)
+    # on the holdout slice; isotonic needs only a few hundred samples, and
+    # reusing the fitted forest avoids training 5 more from scratch
+    print(f"Calibrating probabilities (isotonic, {len(cal_idx)}-sample holdout)...")
+    if FrozenEstimator is not None:
+        calibrated = CalibratedClassifierCV(FrozenEstimator(rf), method='isotonic')
+    else:
+        calibrated = CalibratedClassifierCV(rf, method='isotonic', cv='prefit')
+    calibrated.fit(X_cal, y_cal)
 
     # ---- Evaluation ----
-    rf_train = rf.score(X_train_scaled, y_train)
-    rf_test = rf.score(X_test_scaled, y_test)
-    cal_test = calibrated.score(X_test_scaled, y_test)
+    # One predict pass per (model, split); the calibrated test predictions
+    # are reused for the report below instead of scoring and predicting twice
+    y_pred = calibrated.predict(X_test)
+    rf_train = np.mean(rf.predict(X_fit) == y_fit)
+    rf_test = np.mean(rf.predict(X_test) == y_test)
+    cal_test = np.mean(y_pred == y_test)
 
     print(f"\nRaw RF - Training accuracy:    {rf_train:.4f}")
     print(f"Raw RF - Test accuracy:        {rf_test:.4f}")
     print(f"Calibrated - Test accuracy:    {cal_test:.4f}")
 
-    # Cross-validation on raw RF
-    cv_scores = cross_val_score(rf, scaler.transform(X), y, cv=5, scoring='accuracy')
-    print(f"5-fold CV accuracy:            {cv_scores.mean():.4f} (+/- {cv_scores.std()*2:.4f})")
+    # Out-of-bag accuracy: each tree scores the rows its bootstrap left
+    # out, a generalisation estimate that needs no cross-validation refits
+    print(f"Raw RF - Out-of-bag accuracy:  {rf.oob_score_:.4f}")
 
     # Classification report
-    y_pred = calibrated.predict(X_test_scaled)
     print("\nClassification Report (Calibrated Model):")
     print(classification_report(y_test, y_pred,
                                 target_names=['Legitimate', 'Phishing']))
@@ -531,13 +714,16 @@ def train_unified_model(X, y):
     print("Confusion Matrix:")
     print(cm)
 
-    # Feature importance (from underlying RF)
-    importance = dict(zip(UNIFIED_FEATURES, rf.feature_importances_))
+    # Feature importance (from underlying RF); partition out the top 15
+    # and sort only those
+    importances = rf.feature_importances_
+    top = np.argpartition(importances, -15)[-15:]
+    top = top[np.argsort(-importances[top])]
     print("\nTop 15 most important features:")
-    for feat, imp in sorted(importance.items(), key=lambda x: x[1], reverse=True)[:15]:
-        print(f"  {feat}: {imp:.4f}")
+    for i in top:
+        print(f"  {UNIFIED_FEATURES[i]}: {importances[i]:.4f}")
 
-    return calibrated, rf, scaler, cal_test
+    return calibrated, rf, cal_test, X_test, y_test, y_pred
 
 
 # ======================================================================
@@ -548,78 +734,61 @@ def train_unified_model(X, y):
 # calibration without needing the full sklearn CalibratedClassifierCV.
 # ======================================================================
 
-def build_calibration_table(calibrated_model, rf, scaler, X, n_points=200):
+def build_calibration_table(calibrated_model, rf, X):
     """
-    Build an isotonic calibration lookup table by sampling the raw RF
-    probability space uniformly and mapping each point through the
-    calibrated model's internal calibrators.
+    Build the isotonic calibration lookup table from the knots of the
+    calibrated model's fitted isotonic calibrator. Isotonic regression
+    is piecewise linear between its thresholds and clipped outside them,
+    which is exactly what applyIsotonicCalibration() in content.js
+    computes, so the browser reproduces the calibrated probabilities.
 
     @param calibrated_model: The CalibratedClassifierCV-wrapped model.
     @type calibrated_model: CalibratedClassifierCV
-    @param rf: The underlying (uncalibrated) RandomForestClassifier.
+    @param rf: The underlying (uncalibrated) RandomForestClassifier
+               (unused; kept for API consistency).
     @type rf: RandomForestClassifier
-    @param scaler: The StandardScaler used during training (unused here
-                   but kept for API consistency).
-    @type scaler: StandardScaler
     @param X: Training data (unused; kept for API consistency).
     @type X: pd.DataFrame or None
-    @param n_points: Number of evenly spaced points in [0.0, 1.0].
-    @type n_points: int
     @returns: Tuple of (x_values, y_values) where x = raw probability
               and y = calibrated probability, both as lists of floats.
     @rtype: tuple[list[float], list[float]]
     """
-    # Generate evenly spaced raw probabilities
-    x_raw = np.linspace(0.0, 1.0, n_points)
-
-    # We need to map raw probs -> calibrated probs
-    # Use the calibrated model's calibrators directly
-    # CalibratedClassifierCV stores calibrators in .calibrated_classifiers_
-    # Each has a .calibrators_ list (one per class)
+    # For a binary problem each entry of .calibrated_classifiers_ holds a
+    # single calibrator in .calibrators, fitted on the positive (phishing)
+    # class probability; sklearn < 0.24 named the list .calibrators_.
+    # Calibration runs once on a holdout, so there is exactly one
+    # calibrated classifier.
+    cal_cls = calibrated_model.calibrated_classifiers_[0]
+    calibrators = getattr(cal_cls, 'calibrators', None)
+    if calibrators is None:
+        calibrators = cal_cls.calibrators_
+    isotonic = calibrators[0]
 
-    # Approach: create synthetic predictions at each raw prob level
-    # and see what the calibrator maps them to
-    y_cal = []
-    for raw_p in x_raw:
-        # For isotonic calibration, we can use the calibrator's predict method
-        # The calibrators map raw probability -> calibrated probability
-        try:
-            # Access the first calibrated classifier's calibrator for class 1
-            cal_cls = calibrated_model.calibrated_classifiers_[0]
-            calibrator = cal_cls.calibrators_[1]  # class 1 (phishing)
-            mapped = calibrator.predict(np.array([raw_p]))[0]
-            y_cal.append(float(np.clip(mapped, 0.0, 1.0)))
-        except Exception:
-            y_cal.append(float(raw_p))  # fallback: identity
-
-    return x_raw.tolist(), y_cal
+    return isotonic.X_thresholds_.tolist(), isotonic.y_thresholds_.tolist()
 
 
 # ======================================================================
 # MODEL EXPORT
 # Serialises the trained model in two formats:
 #   1. sklearn pickle files (.pkl) for future retraining in Python
-#   2. A single JSON file containing tree structures, scaler stats, and
+#   2. A single JSON file containing tree structures and
 #      calibration lookup table for in-browser inference via JavaScript
 # ======================================================================
 
-def export_unified_model(calibrated, rf, scaler, feature_names, output_dir='model'):
+def export_unified_model(calibrated, rf, feature_names, output_dir='model'):
     """
     Export all model artifacts to the output directory.
 
     Produces:
         model_calibrated.pkl  — Full CalibratedClassifierCV for Python reuse
         model_rf.pkl          — Raw RandomForestClassifier
-        scaler.pkl            — Fitted StandardScaler
         feature_names.json    — Ordered list of 64 feature names
-        model_unified.json    — Combined trees + scaler + calibration for JS
+        model_unified.json    — Combined trees + calibration for JS
 
     @param calibrated: Trained CalibratedClassifierCV model.
     @type calibrated: CalibratedClassifierCV
     @param rf: Underlying RandomForestClassifier.
     @type rf: RandomForestClassifier
-    @param scaler: Fitted StandardScaler.
-    @type scaler: StandardScaler
     @param feature_names: Ordered list of feature name strings.
     @type feature_names: list[str]
     @param output_dir: Directory path for output files.
@@ -627,10 +796,10 @@ def export_unified_model(calibrated, rf, scaler, feature_names, output_dir='mode
     """
     os.makedirs(output_dir, exist_ok=True)
 
-    # Sklearn artifacts
-    joblib.dump(calibrated, f'{output_dir}/model_calibrated.pkl')
-    joblib.dump(rf, f'{output_dir}/model_rf.pkl')
-    joblib.dump(scaler, f'{output_dir}/scaler.pkl')
+    # Sklearn artifacts (forest pickles are large; zlib level 3 shrinks
+    # them several-fold for little CPU)
+    joblib.dump(calibrated, f'{output_dir}/model_calibrated.pkl', compress=3)
+    joblib.dump(rf, f'{output_dir}/model_rf.pkl', compress=3)
 
     # Feature names
     with open(f'{output_dir}/feature_names.json', 'w') as f:
@@ -638,30 +807,69 @@ def export_unified_model(calibrated, rf, scaler, feature_names, output_dir='mode
 
     # Build calibration lookup table
     print("\nBuilding calibration lookup table...")
-    x_vals, y_vals = build_calibration_table(calibrated, rf, scaler, None)
+    x_vals, y_vals = build_calibration_table(calibrated, rf, None)
 
     # Export trees + calibration
-    export_unified_json(rf, scaler, feature_names, x_vals, y_vals,
+    export_unified_json(rf, feature_names, x_vals, y_vals,
                         f'{output_dir}/model_unified.json')
 
     print(f"Model exported to {output_dir}/")
 
 
-def export_unified_json(rf, scaler, feature_names, cal_x, cal_y, output_path):
+def _encode_array(arr, dtype):
+    """
+    Pack a numpy array into a base64 string of little-endian raw bytes so
+    the extension can view it directly as a JS typed array.
+
+    @param arr: Array to encode.
+    @type arr: np.ndarray
+    @param dtype: Little-endian numpy dtype string (e.g. '<f4', '<i4').
+    @type dtype: str
+    @returns: base64 (ASCII) encoding of the array's bytes.
+    @rtype: str
     """
-    Export the Random Forest tree structures, scaler parameters, feature
-    importances, and isotonic calibration lookup table to a single JSON
-    file for direct browser-side inference in the Chrome extension.
+    return base64.b64encode(np.ascontiguousarray(arr, dtype=dtype).tobytes()).decode('ascii')
+
+
+def _float32_thresholds(threshold):
+    """
+    Round split thresholds down to the nearest float32.
+
+    sklearn evaluates splits as float32(x) <= float64(threshold). For any
+    float32 x that is equivalent to x <= t32 where t32 is the largest
+    float32 not above the threshold, so storing t32 keeps every decision
+    identical (plain rounding can land one ulp above and flip a split).
+
+    @param threshold: sklearn tree_.threshold array (float64).
+    @type threshold: np.ndarray
+    @returns: float32 thresholds preserving sklearn's split decisions.
+    @rtype: np.ndarray
+    """
+    t32 = threshold.astype(np.float32)
+    above = t32 > threshold
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def export_unified_json(rf, feature_names, cal_x, cal_y, output_path):
+    """
+    Export the Random Forest tree structures, feature importances, and
+    isotonic calibration lookup table to a single JSON file for direct
+    browser-side inference in the Chrome extension.
 
     Each tree is serialised as parallel arrays (feature indices, thresholds,
     left/right children, leaf values) matching sklearn's internal tree
-    representation. The scaler mean and scale arrays allow the JS engine
-    to normalise feature vectors identically to training.
+    representation. The arrays are written as base64-encoded little-endian
+    typed buffers (tree_encoding='base64') rather than JSON number lists:
+    feature as int16, children as int32, thresholds and leaf values as
+    float32 (value is flattened to [n0_legit, n0_phish, n1_legit, ...]).
+    Thresholds are rounded down so decisions on float32 inputs match
+    sklearn exactly (see _float32_thresholds). The forest is trained on
+    raw features, so no scaler parameters are exported and the JS engine
+    feeds the feature vector to the trees as-is.
 
     @param rf: Trained RandomForestClassifier.
     @type rf: RandomForestClassifier
-    @param scaler: Fitted StandardScaler with mean_ and scale_ arrays.
-    @type scaler: StandardScaler
     @param feature_names: Ordered list of 64 feature name strings.
     @type feature_names: list[str]
     @param cal_x: Raw probability x-values for calibration lookup.
@@ -671,17 +879,6 @@ def export_unified_json(rf, scaler, feature_names, cal_x, cal_y, output_path):
     @param output_path: Filesystem path for the output JSON file.
     @type output_path: str
     """
-    trees = []
-    for estimator in rf.estimators_:
-        tree = estimator.tree_
-        trees.append({
-            'feature':        tree.feature.tolist(),
-            'threshold':      tree.threshold.tolist(),
-            'children_left':  tree.children_left.tolist(),
-            'children_right': tree.children_right.tolist(),
-            'value':          tree.value.squeeze(axis=1).tolist()
-        })
-
     avg_importances = {
         name: float(rf.feature_importances_[i])
         for i, name in enumerate(feature_names)
@@ -693,21 +890,36 @@ def export_unified_json(rf, scaler, feature_names, cal_x, cal_y, output_path):
         'n_features':          len(feature_names),
         'feature_names':       feature_names,
         'feature_importances': avg_importances,
-        'scaler_mean':         scaler.mean_.tolist(),
-        'scaler_scale':        scaler.scale_.tolist(),
+        'tree_encoding':       'base64',
         'calibration': {
             'method': 'isotonic',
             'x_values': cal_x,
             'y_values': cal_y
-        },
-        'trees':               trees
+        }
     }
 
+    # Stream the trees: write the header object, then serialise and write
+    # one tree at a time, so only a single encoded tree is held in memory
+    # rather than the whole list plus its JSON string.
     with open(output_path, 'w') as f:
-        json.dump(model_data, f)
+        f.write(json.dumps(model_data)[:-1])
+        f.write(', "trees": [')
+        for i, estimator in enumerate(rf.estimators_):
+            tree = estimator.tree_
+            if i:
+                f.write(', ')
+            f.write(json.dumps({
+                'n_nodes':        int(tree.node_count),
+                'feature':        _encode_array(tree.feature, '<i2'),
+                'threshold':      _encode_array(_float32_thresholds(tree.threshold), '<f4'),
+                'children_left':  _encode_array(tree.children_left, '<i4'),
+                'children_right': _encode_array(tree.children_right, '<i4'),
+                'value':          _encode_array(tree.value.squeeze(axis=1), '<f4')
+            }))
+        f.write(']}')
 
     size_mb = os.path.getsize(output_path) / (1024 * 1024)
-    print(f"  {os.path.basename(output_path)}: {size_mb:.1f} MB  ({len(trees)} trees, {len(feature_names)} features)")
+    print(f"  {os.path.basename(output_path)}: {size_mb:.1f} MB  ({len(rf.estimators_)} trees, {len(feature_names)} features)")
 
 
 # ======================================================================
@@ -718,7 +930,7 @@ def export_unified_json(rf, scaler, feature_names, cal_x, cal_y, output_path):
 # and F1 for each group independently.
 # ======================================================================
 
-def evaluate_by_type(calibrated, scaler, X_test, y_test):
+def evaluate_by_type(X_test, y_test, y_pred):
     """
     Heuristic-tag test samples by phishing style and report classification
     metrics separately for each type. Uses feature values to infer which
@@ -731,77 +943,69 @@ def evaluate_by_type(calibrated, scaler, X_test, y_test):
         'url_credential_phish'    — Standard URL-based credential phishing
         'other'                   — Does not match any heuristic
 
-    @param calibrated: Trained CalibratedClassifierCV model.
-    @type calibrated: CalibratedClassifierCV
-    @param scaler: Fitted StandardScaler for feature normalisation.
-    @type scaler: StandardScaler
-    @param X_test: Test feature matrix (64 columns).
-    @type X_test: pd.DataFrame
+    @param X_test: Test feature matrix (64 columns, UNIFIED_FEATURES order).
+    @type X_test: np.ndarray or pd.DataFrame
     @param y_test: True labels for the test set.
-    @type y_test: pd.Series
-    """
-    X_scaled = scaler.transform(X_test)
-    y_pred = calibrated.predict(X_scaled)
-    y_prob = calibrated.predict_proba(X_scaled)[:, 1]
-
-    # Heuristic tagging based on feature values
-    tags = []
-    feat_idx = {name: i for i, name in enumerate(UNIFIED_FEATURES)}
-    for i in range(len(X_test)):
-        row = X_test.iloc[i] if hasattr(X_test, 'iloc') else X_test[i]
-
-        # Check which features are active (use .iloc for positional access)
-        has_url = row.iloc[feat_idx['UrlLength']] > 0 if hasattr(row, 'iloc') else row[feat_idx['UrlLength']] > 0
-        has_deepscan = row.iloc[feat_idx['deep_scan_ran']] > 0 if hasattr(row, 'iloc') else row[feat_idx['deep_scan_ran']] > 0
-        is_linkless = row.iloc[feat_idx['LinkCount']] == 0 if hasattr(row, 'iloc') else row[feat_idx['LinkCount']] == 0
-        has_attach = row.iloc[feat_idx['HasAttachment']] > 0 if hasattr(row, 'iloc') else row[feat_idx['HasAttachment']] > 0
-
-        page_active = any(
-            (row.iloc[feat_idx[f]] if hasattr(row, 'iloc') else row[feat_idx[f]]) > 0
-            for f in ['InsecureForms', 'ExtFormAction', 'EmbeddedBrandName', 'IframeOrFrame']
-            if f in feat_idx
-        )
-
-        if is_linkless:
-            tags.append('linkless_bec')
-        elif has_attach:
-            tags.append('attachment_led')
-        elif has_deepscan and page_active:
-            tags.append('deepscan_impersonation')
-        elif has_url:
-            tags.append('url_credential_phish')
-        else:
-            tags.append('other')
-
-    tags = np.array(tags)
+    @type y_test: np.ndarray or pd.Series
+    @param y_pred: Calibrated model's predictions for X_test, as computed
+                   by train_unified_model().
+    @type y_pred: np.ndarray
+    """
+    X_values = np.asarray(X_test, dtype=np.float32)
+
+    # Heuristic tagging based on feature values, one vectorised pass over
+    # the whole test matrix instead of per-row .iloc lookups
+    has_url = X_values[:, FEAT_IDX['UrlLength']] > 0
+    has_deepscan = X_values[:, FEAT_IDX['deep_scan_ran']] > 0
+    is_linkless = X_values[:, FEAT_IDX['LinkCount']] == 0
+    has_attach = X_values[:, FEAT_IDX['HasAttachment']] > 0
+    page_active = (X_values[:, PAGE_SIGNAL_COL_IDX] > 0).any(axis=1)
+
+    # np.select takes the first true condition, same precedence as if/elif
+    tags = np.select(
+        [is_linkless, has_attach, has_deepscan & page_active, has_url],
+        ['linkless_bec', 'attachment_led', 'deepscan_impersonation', 'url_credential_phish'],
+        default='other'
+    )
 
     print("\n" + "=" * 60)
     print("Per-Type Evaluation")
     print("=" * 60)
 
-    for tag in sorted(set(tags)):
-        mask = tags == tag
-        n_samples = mask.sum()
+    # Per-tag confusion counts in one pass: cell = 2*y_true + y_pred gives
+    # columns (tn, fp, fn, tp), so every metric below is vectorised over
+    # tags instead of one classification_report call per tag.
+    tag_names, tag_id = np.unique(tags, return_inverse=True)
+    cell = 2 * np.asarray(y_test, dtype=np.int64) + y_pred
+    counts = np.bincount(4 * tag_id + cell, minlength=4 * len(tag_names)).reshape(-1, 4)
+    tn, fp, fn, tp = counts.T
+    totals = counts.sum(axis=1)
+
+    def ratio(num, den):
+        # sklearn's zero_division=0 convention
+        return np.divide(num, den, out=np.zeros(len(num)), where=den > 0)
+
+    accuracy = ratio(tp + tn, totals)
+    precision = ratio(tp, tp + fp)
+    recall = ratio(tp, tp + fn)
+    f1 = ratio(2 * tp, 2 * tp + fp + fn)
+
+    for i, tag in enumerate(tag_names):
+        n_samples = totals[i]
         if n_samples < 10:
             print(f"\n  [{tag}] - {n_samples} samples (too few for report)")
             continue
 
-        y_t = y_test.values[mask] if hasattr(y_test, 'values') else y_test[mask]
-        y_p = y_pred[mask]
-
         print(f"\n  [{tag}] - {n_samples} samples")
         # Only print report if both classes are present
-        if len(set(y_t)) > 1:
-            report = classification_report(y_t, y_p,
-                                           target_names=['Legitimate', 'Phishing'],
-                                           output_dict=True)
-            print(f"    Accuracy:  {report['accuracy']:.4f}")
-            print(f"    Precision: {report['Phishing']['precision']:.4f}")
-            print(f"    Recall:    {report['Phishing']['recall']:.4f}")
-            print(f"    F1:        {report['Phishing']['f1-score']:.4f}")
+        if tn[i] + fp[i] > 0 and fn[i] + tp[i] > 0:
+            print(f"    Accuracy:  {accuracy[i]:.4f}")
+            print(f"    Precision: {precision[i]:.4f}")
+            print(f"    Recall:    {recall[i]:.4f}")
+            print(f"    F1:        {f1[i]:.4f}")
         else:
-            label = 'Phishing' if y_t[0] == 1 else 'Legitimate'
-            correct = (y_t == y_p).sum()
+            label = 'Phishing' if fn[i] + tp[i] > 0 else 'Legitimate'
+            correct = tp[i] + tn[i]
             print(f"    All {label} - {correct}/{n_samples} correct ({correct/n_samples:.1%})")
 
 
@@ -830,18 +1034,19 @@ def main():
 
     # Train
     print("\nTraining unified model...")
-    calibrated, rf, scaler, test_score = train_unified_model(X, y)
+    calibrated, rf, test_score, X_test, y_test, y_pred = train_unified_model(X, y)
+    # Only the held-out split is needed from here on; release the full
+    # dataset before export and evaluation
+    del X, y
+    gc.collect()
 
     # Export
     print("\nExporting unified model for JS inference...")
-    export_unified_model(calibrated, rf, scaler, UNIFIED_FEATURES)
+    export_unified_model(calibrated, rf, UNIFIED_FEATURES)
 
-    # Per-type evaluation on test split
+    # Per-type evaluation on the test split held out during training
     print("\nRunning per-type evaluation...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-    evaluate_by_type(calibrated, scaler, X_test, y_test)
+    evaluate_by_type(X_test, y_test, y_pred)
 
     # Summary
     print("\n" + "=" * 60)
@@ -853,16 +1058,15 @@ def main():
 
 def _clean_pycache():
     """
-    Remove __pycache__ directory from the project root. Chrome extension
-    loading rejects directories whose names start with an underscore,
-    so this cleanup prevents load failures during development.
+    Remove __pycache__ and .pytest_cache directories from the extension
+    folder. Chrome extension loading rejects directories whose names start
+    with an underscore, so this cleanup prevents load failures during
+    development. Runs the same sweep as clean_for_extension.py, which
+    skips SKIP_DIRS (.git, node_modules, virtualenvs, dist, build).
     """
-    import shutil
-    base = os.path.dirname(os.path.abspath(__file__))
-    pc = os.path.join(base, '__pycache__')
-    if os.path.isdir(pc):
-        shutil.rmtree(pc, ignore_errors=True)
-        print("  (cleaned __pycache__)")
+    from clean_for_extension import remove_caches
+    if remove_caches():
+        print("  (cleaned __pycache__ / .pytest_cache)")
 
 
 if __name__ == '__main__':